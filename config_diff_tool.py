@@ -14,46 +14,118 @@ Directory Structure Example:
         profiles/site.xml
         rc/mongo.rc
 
+Library usage:
+    tool = ConfigDiffTool()
+    for diff in tool.compare({'server1': {'app.rc': 'key=value'}, 'server2': {'app.rc': {'key': 'other'}}}):
+        ...
+
 Usage:
     python config_diff_tool.py <directory_path> [--output output.xlsx] [--verbose] [--ignore-hostnames]
+                               [--max-rows-per-sheet N] [--max-hosts-per-sheet N] [--shard-mode workbooks|sheets]
+                               [--outliers] [--outlier-threshold 0.2]
 """
 
 import os
 import sys
 import argparse
+import hashlib
 import logging
 import re
+from concurrent.futures import ProcessPoolExecutor
+from glob import escape as glob_escape
+from itertools import groupby
 from pathlib import Path
 from collections import defaultdict, OrderedDict
-from typing import Dict, List, Set, Tuple, Any
+from typing import Dict, Iterable, Iterator, List, Mapping, Optional, Set, Tuple, Union, Any
+import numpy as np
 import pandas as pd
 from openpyxl import Workbook
 from openpyxl.styles import PatternFill, Font
+from openpyxl.worksheet.hyperlink import Hyperlink
 from openpyxl.utils.dataframe import dataframe_to_rows
 
 
+# Hard limits of the .xlsx format
+EXCEL_MAX_ROWS = 1048576
+EXCEL_MAX_COLUMNS = 16384
+
+# The differences sheet uses 3 header rows and 2 leading columns (File Name, Key)
+DIFF_SHEET_HEADER_ROWS = 3
+DIFF_SHEET_LEADING_COLUMNS = 2
+
+# Default shard sizes - kept well below the hard limits so each shard opens quickly
+DEFAULT_MAX_ROWS_PER_SHEET = 50000
+DEFAULT_MAX_HOSTS_PER_SHEET = 500
+
+# MinHash / LSH parameters for --outliers mode (MINHASH_PERMUTATIONS = LSH_BANDS * rows per band)
+MINHASH_PERMUTATIONS = 128
+LSH_BANDS = 32
+MINHASH_PRIME = (1 << 31) - 1  # Keeps (a * h + b) within uint64
+LSH_MAX_BUCKET_COMPARISONS = 50  # Cap on peers compared per host in one bucket, keeps LSH near-linear
+OUTLIER_EXHAUSTIVE_MAX_HOSTS = 256  # Below this many distinct signatures, compare every pair instead of LSH
+DEFAULT_OUTLIER_THRESHOLD = 0.2
+DEFAULT_OUTLIER_NEIGHBORS = 3
+
+
+def _write_shard_workbook(output_path: str, title: str, analysis: Dict[str, Any]) -> str:
+    """
+    Write a single shard of the differences report to its own workbook.
+    
+    Kept at module level so it can be dispatched to worker processes.
+    
+    Returns:
+        The path of the written workbook
+    """
+    wb = Workbook()
+    ws = wb.active
+    ws.title = title
+    ws['A1'] = f"Configuration Differences - {title}"
+    ws['A1'].font = Font(bold=True, size=12)
+    ConfigDiffTool._write_diff_rows(ws, analysis)
+    wb.save(output_path)
+    return output_path
+
+
 class ConfigDiffTool:
     """Main class for comparing configuration files across server directories."""
     
-    def __init__(self, base_directory: str, output_file: str = "config_diff_report.xlsx", 
-                 ignore_hostnames: bool = False):
-        self.base_directory = Path(base_directory)
+    def __init__(self, base_directory: Optional[str] = None, output_file: str = "config_diff_report.xlsx", 
+                 ignore_hostnames: bool = False,
+                 max_rows_per_sheet: int = DEFAULT_MAX_ROWS_PER_SHEET,
+                 max_hosts_per_sheet: int = DEFAULT_MAX_HOSTS_PER_SHEET,
+                 shard_mode: str = "workbooks", workers: Optional[int] = None,
+                 logger: Optional[logging.Logger] = None,
+                 outliers: bool = False, outlier_threshold: float = DEFAULT_OUTLIER_THRESHOLD,
+                 outlier_neighbors: int = DEFAULT_OUTLIER_NEIGHBORS):
+        # base_directory may be omitted when configs are supplied in memory via load_configs()/compare()
+        self.base_directory = Path(base_directory) if base_directory is not None else None
         self.output_file = output_file
         self.ignore_hostnames = ignore_hostnames
+        if shard_mode not in ("sheets", "workbooks"):
+            raise ValueError(f"Invalid shard mode: {shard_mode} (expected 'sheets' or 'workbooks')")
+        # Never allow a shard to exceed what Excel can actually open
+        self.max_rows_per_sheet = max(1, min(max_rows_per_sheet, EXCEL_MAX_ROWS - DIFF_SHEET_HEADER_ROWS))
+        self.max_hosts_per_sheet = max(1, min(max_hosts_per_sheet, EXCEL_MAX_COLUMNS - DIFF_SHEET_LEADING_COLUMNS))
+        self.shard_mode = shard_mode
+        self.workers = workers
+        self.outliers = outliers
+        self.outlier_threshold = outlier_threshold
+        self.outlier_neighbors = max(1, outlier_neighbors)
         self.config_extensions = {'.rc', '.xml', '.jrc'}
         self.host_configs = defaultdict(dict)  # {host: {filename: OrderedDict{key: value}}}
         self.all_files = set()
         self.all_keys_per_file = defaultdict(list)  # Changed to list to preserve order
         self.file_key_order = defaultdict(list)  # Track the order keys appear in each file
         
-
-        
-        # Set up logging
-        logging.basicConfig(
-            level=logging.INFO,
-            format='%(asctime)s - %(levelname)s - %(message)s'
-        )
-        self.logger = logging.getLogger(__name__)
+        # Logging is configured by the caller (see main()), never on the root logger here
+        self.logger = logger or logging.getLogger(__name__)
+    
+    def reset(self) -> None:
+        """Clear all parsed configuration state so the instance can be reused for another run."""
+        self.host_configs = defaultdict(dict)
+        self.all_files = set()
+        self.all_keys_per_file = defaultdict(list)
+        self.file_key_order = defaultdict(list)
     
     def is_valid_config_file(self, file_path: Path) -> bool:
         """Check if a file is a valid configuration file based on extension."""
@@ -138,30 +210,49 @@ class ConfigDiffTool:
         
         try:
             with open(file_path, 'r', encoding='utf-8', errors='ignore') as file:
-                for line_num, line in enumerate(file, 1):
-                    # Strip whitespace
-                    line = line.strip()
-                    
-                    # Skip empty lines and comments
-                    if not line or line.startswith('#'):
-                        continue
-                    
-                    # Split by '=' and ensure we have both key and value
-                    if '=' in line:
-                        key, value = line.split('=', 1)  # Split only on first '='
-                        key = key.strip()
-                        value = value.strip()
-                        
-                        if key:  # Only add if key is not empty
-                            config_data[key] = value
-                            
+                config_data = self.parse_config_lines(file)
+                
         except Exception as e:
             self.logger.warning(f"Error parsing {file_path}: {e}")
             
         return config_data
     
+    @staticmethod
+    def parse_config_lines(lines: Iterable[str]) -> OrderedDict[str, str]:
+        """
+        Parse configuration lines into key-value pairs, preserving order.
+        
+        Args:
+            lines: Lines of a configuration file (an open file, a list, or str.splitlines())
+            
+        Returns:
+            OrderedDict of key-value pairs in the order they appear
+        """
+        config_data = OrderedDict()
+        
+        for line in lines:
+            # Strip whitespace
+            line = line.strip()
+            
+            # Skip empty lines and comments
+            if not line or line.startswith('#'):
+                continue
+            
+            # Split by '=' and ensure we have both key and value
+            if '=' in line:
+                key, value = line.split('=', 1)  # Split only on first '='
+                key = key.strip()
+                value = value.strip()
+                
+                if key:  # Only add if key is not empty
+                    config_data[key] = value
+        
+        return config_data
+    
     def scan_directories(self) -> None:
         """Recursively scan the base directory for host subdirectories and their config files."""
+        if self.base_directory is None:
+            raise ValueError("No base directory configured; use load_configs() for in-memory configs")
         if not self.base_directory.exists():
             raise FileNotFoundError(f"Directory {self.base_directory} does not exist")
         
@@ -191,32 +282,60 @@ class ConfigDiffTool:
                     # Use the full relative path as file identifier to handle files with same name in different subdirs
                     file_identifier = str(relative_path).replace('\\', '/')  # Normalize path separators
                     
-                    self.all_files.add(file_identifier)
                     config_files_found += 1
                     
                     # Parse the configuration file
                     config_data = self.parse_config_file(config_file)
-                    self.host_configs[host_name][file_identifier] = config_data
-                    
-                    # Track key order for this file (use the first host that has this file)
-                    if file_identifier not in self.file_key_order:
-                        self.file_key_order[file_identifier] = list(config_data.keys())
-                    else:
-                        # Add any new keys that weren't in the first file we saw
-                        existing_keys = set(self.file_key_order[file_identifier])
-                        for key in config_data.keys():
-                            if key not in existing_keys:
-                                self.file_key_order[file_identifier].append(key)
-                    
-                    # Update all keys for this file (maintaining order)
-                    for key in config_data.keys():
-                        if key not in self.all_keys_per_file[file_identifier]:
-                            self.all_keys_per_file[file_identifier].append(key)
+                    self._add_config(host_name, file_identifier, config_data)
                     
                     self.logger.debug(f"Parsed {file_identifier} for {host_name}: {len(config_data)} keys")
             
             self.logger.info(f"Found {config_files_found} config files in {host_name}")
     
+    def _add_config(self, host_name: str, file_identifier: str, config_data: OrderedDict[str, str]) -> None:
+        """Register one parsed config file for a host and track its key order."""
+        self.all_files.add(file_identifier)
+        self.host_configs[host_name][file_identifier] = config_data
+        
+        # Track key order for this file (use the first host that has this file)
+        if file_identifier not in self.file_key_order:
+            self.file_key_order[file_identifier] = list(config_data.keys())
+        else:
+            # Add any new keys that weren't in the first file we saw
+            existing_keys = set(self.file_key_order[file_identifier])
+            for key in config_data.keys():
+                if key not in existing_keys:
+                    self.file_key_order[file_identifier].append(key)
+        
+        # Update all keys for this file (maintaining order)
+        for key in config_data.keys():
+            if key not in self.all_keys_per_file[file_identifier]:
+                self.all_keys_per_file[file_identifier].append(key)
+    
+    def load_configs(self, host_configs: Mapping[str, Mapping[str, Union[str, Mapping[str, str]]]]) -> None:
+        """
+        Load configs from memory instead of scanning a directory, replacing any previous state.
+        
+        Args:
+            host_configs: {host: {file_identifier: config}}, where each config is either
+                raw file text or an already-parsed mapping of key-value pairs. In parsed
+                mappings a None value is treated as empty, like "key=" in a file.
+        """
+        self.reset()
+        
+        for host_name, files in host_configs.items():
+            # Register the host even if it has no files, so it is reported as missing them
+            self.host_configs[host_name]
+            for file_identifier, config in files.items():
+                if isinstance(config, str):
+                    config_data = self.parse_config_lines(config.splitlines())
+                else:
+                    config_data = OrderedDict((str(key), '' if value is None else str(value))
+                                              for key, value in config.items())
+                self._add_config(host_name, file_identifier, config_data)
+        
+        self.logger.debug(f"Loaded {len(self.host_configs)} hosts from memory")
+    
     def find_differences(self) -> List[Dict[str, Any]]:
         """
         Find differences in configuration values across hosts.
@@ -224,21 +343,78 @@ class ConfigDiffTool:
         Returns:
             List of all differences with file name included
         """
-        all_differences = []
+        return list(self.iter_differences())
+    
+    def compare(self, host_configs: Optional[Mapping[str, Mapping[str, Union[str, Mapping[str, str]]]]] = None
+                ) -> Iterator[Dict[str, Any]]:
+        """
+        Library entry point: load configs and stream the differences, without writing any files.
+        
+        Every call starts from a clean state, so one instance can be reused across runs.
+        Configs are loaded before this returns (so loading errors are raised here), and
+        each returned stream keeps reading the configs it was started with even if
+        compare() is called again before it is exhausted.
         
-        for file_name in sorted(self.all_files):
+        Args:
+            host_configs: In-memory configs as accepted by load_configs(); when omitted,
+                base_directory is scanned instead
+            
+        Returns:
+            Iterator of difference records, as returned by find_differences()
+        """
+        if host_configs is not None:
+            self.load_configs(host_configs)
+        else:
+            self.reset()
+            self.scan_directories()
+        
+        return self.iter_differences()
+    
+    def iter_differences(self, hosts: Optional[Iterable[str]] = None) -> Iterator[Dict[str, Any]]:
+        """
+        Lazily find differences in configuration values across the loaded hosts.
+        
+        Files are processed one at a time, so records are available as soon as
+        each key has been compared rather than after the whole tree is analyzed.
+        The iterator holds on to the parsed state loaded when it was created, so a
+        later reset()/load_configs() does not affect a stream that is still being read.
+        
+        Args:
+            hosts: Only compare these hosts (default: all loaded hosts)
+            
+        Raises:
+            ValueError: If hosts contains a host that has not been loaded
+            
+        Returns:
+            Iterator with one difference record per (file, key) that differs across hosts
+        """
+        if hosts is not None:
+            host_names = sorted(hosts)
+            unknown_hosts = [host_name for host_name in host_names if host_name not in self.host_configs]
+            if unknown_hosts:
+                raise ValueError(f"Unknown hosts: {', '.join(unknown_hosts)}")
+        else:
+            host_names = sorted(self.host_configs.keys())
+        
+        # reset() swaps in new containers, so these references are a stable snapshot
+        return self._iter_differences(host_names, self.host_configs, self.all_files, self.file_key_order)
+    
+    def _iter_differences(self, host_names: List[str], host_configs: Dict[str, Dict[str, OrderedDict]],
+                          all_files: Set[str], file_key_order: Dict[str, List[str]]) -> Iterator[Dict[str, Any]]:
+        """Generator behind iter_differences(), reading only the state it was given."""
+        for file_name in sorted(all_files):
             # Use the preserved order instead of sorting
-            all_keys = self.file_key_order[file_name]
+            all_keys = file_key_order[file_name]
             
             for key in all_keys:
                 # Collect values for this key across all hosts
                 key_values = {}
                 hosts_with_key = []
                 
-                for host_name in sorted(self.host_configs.keys()):
-                    if file_name in self.host_configs[host_name]:
-                        if key in self.host_configs[host_name][file_name]:
-                            value = self.host_configs[host_name][file_name][key]
+                for host_name in host_names:
+                    if file_name in host_configs[host_name]:
+                        if key in host_configs[host_name][file_name]:
+                            value = host_configs[host_name][file_name][key]
                             key_values[host_name] = value
                             hosts_with_key.append(host_name)
                         else:
@@ -246,6 +422,10 @@ class ConfigDiffTool:
                     else:
                         key_values[host_name] = "** FILE NOT FOUND **"
                 
+                # Key only exists on hosts outside the compared subset
+                if not hosts_with_key:
+                    continue
+                
                 # Check if there are differences in values
                 unique_values = set(v for v in key_values.values() 
                                   if v not in ["** MISSING **", "** FILE NOT FOUND **"])
@@ -283,25 +463,309 @@ class ConfigDiffTool:
                         'has_missing_file': "** FILE NOT FOUND **" in key_values.values(),
                         'hostname_normalized': self.ignore_hostnames
                     }
-                    all_differences.append(diff_entry)
+                    yield diff_entry
+    
+    def _host_element_hashes(self, host_name: str) -> np.ndarray:
+        """Hash each (file, key, value) entry of a host's configs to a 32-bit integer."""
+        hashes = []
+        for file_name, config_data in self.host_configs[host_name].items():
+            for key, value in config_data.items():
+                if self.ignore_hostnames:
+                    value = self._normalize_hostnames(value)
+                element = f"{file_name}\0{key}\0{value}".encode('utf-8', errors='ignore')
+                hashes.append(int.from_bytes(hashlib.blake2b(element, digest_size=4).digest(), 'little'))
+        return np.array(hashes, dtype=np.uint64)
+    
+    def compute_minhash_signatures(self, chunk_size: int = 8192) -> Dict[str, np.ndarray]:
+        """
+        Compute a MinHash signature over each host's set of (file, key, value) entries.
+        
+        Returns:
+            {host: signature array of MINHASH_PERMUTATIONS values}
+        """
+        # Fixed seed so signatures (and outlier scores) are reproducible between runs
+        rng = np.random.default_rng(0)
+        a = rng.integers(1, MINHASH_PRIME, size=MINHASH_PERMUTATIONS, dtype=np.uint64)[:, None]
+        b = rng.integers(0, MINHASH_PRIME, size=MINHASH_PERMUTATIONS, dtype=np.uint64)[:, None]
+        
+        signatures = {}
+        for host_name in sorted(self.host_configs.keys()):
+            element_hashes = self._host_element_hashes(host_name) % np.uint64(MINHASH_PRIME)
+            signature = np.full(MINHASH_PERMUTATIONS, MINHASH_PRIME, dtype=np.uint64)
+            
+            # Process in chunks to bound the (permutations x entries) intermediate array
+            for start in range(0, len(element_hashes), chunk_size):
+                chunk = element_hashes[start:start + chunk_size][None, :]
+                permuted = (a * chunk + b) % np.uint64(MINHASH_PRIME)
+                signature = np.minimum(signature, permuted.min(axis=1))
+            
+            signatures[host_name] = signature
+        
+        return signatures
+    
+    def find_outliers(self) -> List[Dict[str, Any]]:
+        """
+        Rank hosts by how far their configs sit from their nearest peers.
+        
+        Uses MinHash signatures with locality-sensitive hashing (banding) so only
+        likely-similar hosts are compared, keeping the cost near-linear in the
+        number of hosts; small fleets compare every pair instead. A host's outlier
+        score is 1 minus its mean estimated Jaccard similarity to its
+        outlier_neighbors closest peers. Neighbor slots without a peer are filled
+        with the similarity to a reference host (a member of the largest group of
+        identical hosts), so a small group of identically misconfigured hosts is
+        still flagged, and a host with no peer at all is reported against the
+        reference host with score 1 - similarity.
+        
+        Returns:
+            One entry per host, sorted by outlier score (highest first)
+        """
+        signatures = self.compute_minhash_signatures()
+        host_names = list(signatures.keys())
+        rows_per_band = MINHASH_PERMUTATIONS // LSH_BANDS
+        
+        # Hosts with identical signatures are exact peers; compare only one representative per group
+        groups = defaultdict(list)
+        for host_name in host_names:
+            groups[signatures[host_name].tobytes()].append(host_name)
+        representatives = [members[0] for members in groups.values()]
+        
+        if len(representatives) <= OUTLIER_EXHAUSTIVE_MAX_HOSTS:
+            # Small fleets: LSH would miss most pairs, and comparing all of them is cheap
+            matrix = np.stack([signatures[host_name] for host_name in representatives])
+            similarity_matrix = (matrix[:, None, :] == matrix[None, :, :]).mean(axis=2)
+            candidate_similarity = {
+                host_name: [(float(similarity_matrix[i, j]), peer)
+                            for j, peer in enumerate(representatives) if j != i]
+                for i, host_name in enumerate(representatives)
+            }
+        else:
+            # Band the representative signatures into LSH buckets
+            buckets = defaultdict(list)
+            for host_name in representatives:
+                signature = signatures[host_name]
+                for band in range(LSH_BANDS):
+                    band_slice = signature[band * rows_per_band:(band + 1) * rows_per_band]
+                    buckets[(band, band_slice.tobytes())].append(host_name)
+            
+            # Collect candidate peers per representative, capped so large buckets stay near-linear
+            candidates = defaultdict(set)
+            for members in buckets.values():
+                if len(members) < 2:
+                    continue
+                stride = max(1, len(members) // LSH_MAX_BUCKET_COMPARISONS)
+                sampled = members[::stride]
+                for host_name in members:
+                    host_candidates = candidates[host_name]
+                    for peer in sampled:
+                        if len(host_candidates) >= LSH_MAX_BUCKET_COMPARISONS:
+                            break
+                        if peer != host_name:
+                            host_candidates.add(peer)
+                            candidates[peer].add(host_name)
+            
+            # Estimated Jaccard similarity = fraction of matching signature positions
+            candidate_similarity = {}
+            for host_name in representatives:
+                peers = sorted(candidates[host_name])
+                if not peers:
+                    candidate_similarity[host_name] = []
+                    continue
+                peer_signatures = np.stack([signatures[peer] for peer in peers])
+                similarities = (peer_signatures == signatures[host_name]).mean(axis=1)
+                candidate_similarity[host_name] = list(zip(similarities.tolist(), peers))
+        
+        # Reference host for empty neighbor slots: a member of the most common config
+        reference_groups = sorted(groups.values(), key=lambda members: (-len(members), members[0]))
+        
+        results = []
+        for members in groups.values():
+            representative = members[0]
+            
+            # Best candidate peers, expanded to their group members (only as many as can be used)
+            peer_scores = []
+            for similarity, peer in sorted(candidate_similarity[representative], key=lambda item: (-item[0], item[1])):
+                if len(peer_scores) >= self.outlier_neighbors:
+                    break
+                peer_scores.extend((similarity, peer_host) for peer_host in
+                                   groups[signatures[peer].tobytes()][:self.outlier_neighbors])
+            
+            # The largest group other than this host's own (none if every host is identical)
+            reference = next((group[0] for group in reference_groups if group is not members), None)
+            if reference is not None:
+                reference_similarity = float(np.mean(signatures[reference] == signatures[representative]))
+            
+            for host_name in members:
+                # Other members of the same group are exact (similarity 1.0) peers
+                exact_peers = [(1.0, peer) for peer in members[:self.outlier_neighbors + 1] if peer != host_name]
+                nearest = (exact_peers + peer_scores)[:self.outlier_neighbors]
+                
+                # Fill the remaining neighbor slots with the reference host
+                if reference is not None:
+                    nearest += [(reference_similarity, reference)] * (self.outlier_neighbors - len(nearest))
                 
-        return all_differences
+                if nearest:
+                    score = 1.0 - sum(similarity for similarity, _ in nearest) / len(nearest)
+                else:
+                    score = 1.0
+                
+                results.append({
+                    'host': host_name,
+                    'score': round(score, 4),
+                    'nearest_peer': nearest[0][1] if nearest else None,
+                    'nearest_similarity': round(nearest[0][0], 4) if nearest else 0.0,
+                    'flagged': score > self.outlier_threshold,
+                })
+        
+        results.sort(key=lambda item: (-item['score'], item['host']))
+        return results
+    
+    def analyze_differences(self, differences: List[Dict[str, Any]],
+                            host_names: Optional[List[str]] = None) -> Dict[str, Any]:
+        """
+        Batch analysis of all difference rows at once, shared by every report backend.
+        
+        Values are encoded to integer codes in a (rows x hosts) array, and per-row value
+        counts, majority values and highlight masks are computed with array operations
+        instead of per-row Python dicts.
+        
+        Args:
+            differences: Difference records from find_differences()/iter_differences()
+            host_names: Host columns, in display order (default: all hosts). Majorities
+                and highlights are always computed over every host in each record,
+                so showing a subset of hosts does not change which cells are flagged.
+            
+        Returns:
+            Dict with 'host_names', 'file_names', 'keys', 'values' (rows x hosts) and
+            boolean masks 'missing', 'file_not_found' and 'highlight' (minority hosts)
+        """
+        if host_names is None:
+            host_names = sorted(self.host_configs.keys())
+        
+        host_names = list(host_names)
+        n_rows = len(differences)
+        
+        # Count values over every host in the records; hidden hosts are appended, then sliced off
+        hidden_hosts = sorted(set().union(*(diff['hosts'] for diff in differences)) - set(host_names))
+        all_hosts = host_names + hidden_hosts
+        values = pd.DataFrame([diff['hosts'] for diff in differences], columns=all_hosts).to_numpy(
+            dtype=object, copy=True)
+        values = values.reshape(n_rows, len(all_hosts))
+        
+        # Hosts absent from a record (e.g. records produced for a different host set)
+        not_found = pd.isna(values)
+        values[not_found] = "** NOT FOUND **"
+        missing = values == "** MISSING **"
+        file_not_found = values == "** FILE NOT FOUND **"
+        actual = ~(missing | file_not_found | not_found)
+        
+        # Encode actual values to integer codes; -1 marks missing/not-found cells
+        actual_rows, _ = np.nonzero(actual)
+        codes, uniques = pd.factorize(values[actual])
+        code_matrix = np.full(values.shape, -1, dtype=np.int64)
+        code_matrix[actual] = codes
+        
+        # Count each (row, value) pair in one pass
+        n_values = max(len(uniques), 1)
+        pairs, counts = np.unique(actual_rows.astype(np.int64) * n_values + codes, return_counts=True)
+        pair_rows = pairs // n_values
+        pair_codes = pairs % n_values
+        
+        distinct_counts = np.bincount(pair_rows, minlength=n_rows)
+        max_counts = np.zeros(n_rows, dtype=np.int64)
+        np.maximum.at(max_counts, pair_rows, counts)
+        
+        # A clear majority is a single most common value seen on more than one host
+        at_max = counts == max_counts[pair_rows]
+        values_at_max = np.bincount(pair_rows[at_max], minlength=n_rows)
+        majority_codes = np.full(n_rows, -1, dtype=np.int64)
+        majority_codes[pair_rows[at_max]] = pair_codes[at_max]
+        clear_majority = (values_at_max == 1) & (max_counts > 1)
+        majority_codes[~clear_majority] = -1
+        
+        # With a clear majority only minority values are highlighted, otherwise every actual value is
+        highlight = (actual & (distinct_counts > 1)[:, None]
+                     & ((majority_codes < 0)[:, None] | (code_matrix != majority_codes[:, None])))
+        
+        shown = slice(0, len(host_names))
+        return {
+            'host_names': host_names,
+            'file_names': np.array([diff['file_name'] for diff in differences], dtype=object),
+            'keys': np.array([diff['key'] for diff in differences], dtype=object),
+            'values': values[:, shown],
+            'missing': missing[:, shown],
+            'file_not_found': file_not_found[:, shown],
+            'highlight': highlight[:, shown],
+        }
+    
+    @staticmethod
+    def _slice_analysis(analysis: Dict[str, Any], rows: slice, columns: slice) -> Dict[str, Any]:
+        """Take the rows and host columns of a batch analysis that belong to one shard."""
+        return {
+            'host_names': analysis['host_names'][columns],
+            'file_names': analysis['file_names'][rows],
+            'keys': analysis['keys'][rows],
+            'values': analysis['values'][rows, columns],
+            'missing': analysis['missing'][rows, columns],
+            'file_not_found': analysis['file_not_found'][rows, columns],
+            'highlight': analysis['highlight'][rows, columns],
+        }
     
-    def create_excel_report(self, differences: List[Dict[str, Any]]) -> None:
-        """Create an Excel report with all differences on one sheet."""
+    def create_excel_report(self, differences: List[Dict[str, Any]], host_names: Optional[List[str]] = None,
+                            outliers: Optional[List[Dict[str, Any]]] = None) -> None:
+        """
+        Create an Excel report with all differences.
+        
+        Differences that fit within a single sheet are written to one "All Differences"
+        sheet. Larger reports are sharded by file (rows) and host range (columns), and
+        "All Differences" becomes an index sheet linking to each shard. Shards are
+        separate workbooks by default, so each one opens quickly; shard_mode="sheets"
+        keeps them in this workbook, which only avoids Excel's hard limits.
+        
+        Args:
+            differences: Difference records from find_differences()/iter_differences()
+            host_names: Host columns to show (default: all hosts)
+            outliers: Results of find_outliers(), added as an "Outliers" sheet when given
+        """
+        if host_names is None:
+            host_names = sorted(self.host_configs.keys())
+        
         wb = Workbook()
         
         # Remove default worksheet
         wb.remove(wb.active)
         
+        # Shard workbooks from an earlier run would otherwise sit next to an index that doesn't link them
+        self._remove_stale_shard_workbooks()
+        
         # Create summary worksheet
         summary_ws = wb.create_sheet("Summary")
         self._create_summary_sheet(summary_ws, differences)
         
-        # Create single consolidated differences worksheet
+        # Create outlier ranking worksheet
+        if outliers is not None:
+            outliers_ws = wb.create_sheet("Outliers")
+            self._create_outliers_sheet(outliers_ws, outliers)
+        
+        # Create consolidated differences worksheet(s)
         if differences:
+            analysis = self.analyze_differences(differences, host_names)
+            shards = self._plan_shards(differences, analysis)
             diff_ws = wb.create_sheet("All Differences")
-            self._create_consolidated_diff_sheet(diff_ws, differences)
+            
+            if len(shards) == 1:
+                self._create_consolidated_diff_sheet(diff_ws, analysis)
+            else:
+                self.logger.info(f"Report exceeds shard limits, splitting into {len(shards)} {self.shard_mode}")
+                if self.shard_mode == "workbooks":
+                    self._write_shard_workbooks(shards)
+                else:
+                    for shard in shards:
+                        shard_ws = wb.create_sheet(shard['title'])
+                        shard_ws['A1'] = f"Configuration Differences - {shard['title']}"
+                        shard_ws['A1'].font = Font(bold=True, size=12)
+                        self._write_diff_rows(shard_ws, shard['analysis'])
+                self._create_shard_index_sheet(diff_ws, shards)
         
         # Create host overview worksheet
         overview_ws = wb.create_sheet("Host Overview")
@@ -311,6 +775,125 @@ class ConfigDiffTool:
         wb.save(self.output_file)
         self.logger.info(f"Excel report saved to: {self.output_file}")
     
+    def _split_rows_by_file(self, differences: List[Dict[str, Any]]) -> List[List[Dict[str, Any]]]:
+        """
+        Split difference rows into chunks of at most max_rows_per_sheet rows.
+        
+        Whole files are kept together where possible; a single file with more
+        differences than the limit is split across consecutive chunks.
+        """
+        chunks = []
+        current = []
+        
+        for _, group in groupby(differences, key=lambda diff: diff['file_name']):
+            group = list(group)
+            
+            if current and len(current) + len(group) > self.max_rows_per_sheet:
+                chunks.append(current)
+                current = []
+            
+            # Oversized file - emit full chunks and carry the remainder forward
+            while len(group) > self.max_rows_per_sheet:
+                chunks.append(group[:self.max_rows_per_sheet])
+                group = group[self.max_rows_per_sheet:]
+            
+            current.extend(group)
+        
+        if current:
+            chunks.append(current)
+        
+        return chunks
+    
+    def _plan_shards(self, differences: List[Dict[str, Any]], analysis: Dict[str, Any]) -> List[Dict[str, Any]]:
+        """
+        Plan how the differences are split across sheets or workbooks.
+        
+        Returns:
+            List of shards, each with a title, its difference rows, its host range
+            and the matching slice of the batch analysis
+        """
+        host_count = len(analysis['host_names'])
+        host_ranges = [slice(i, i + self.max_hosts_per_sheet)
+                       for i in range(0, host_count, self.max_hosts_per_sheet)] or [slice(0, 0)]
+        
+        shards = []
+        row_start = 0
+        for row_chunk in self._split_rows_by_file(differences):
+            rows = slice(row_start, row_start + len(row_chunk))
+            row_start = rows.stop
+            for columns in host_ranges:
+                shard_number = len(shards) + 1
+                shards.append({
+                    'title': f"Differences {shard_number}",
+                    'differences': row_chunk,
+                    'host_names': analysis['host_names'][columns],
+                    'first_file': row_chunk[0]['file_name'],
+                    'last_file': row_chunk[-1]['file_name'],
+                    'analysis': self._slice_analysis(analysis, rows, columns),
+                })
+        
+        return shards
+    
+    def _shard_workbook_path(self, shard_number: int) -> Path:
+        """Get the output path of a shard workbook, placed next to the main report."""
+        output_path = Path(self.output_file)
+        return output_path.with_name(f"{output_path.stem}_part{shard_number}{output_path.suffix or '.xlsx'}")
+    
+    def _remove_stale_shard_workbooks(self) -> None:
+        """Delete <report>_partN workbooks left next to the output file by a previous run."""
+        output_path = Path(self.output_file)
+        suffix = output_path.suffix or '.xlsx'
+        shard_pattern = re.compile(rf"{re.escape(output_path.stem)}_part\d+{re.escape(suffix)}")
+        
+        for path in output_path.parent.glob(f"{glob_escape(output_path.stem)}_part*{suffix}"):
+            if shard_pattern.fullmatch(path.name):
+                path.unlink()
+                self.logger.debug(f"Removed stale shard workbook: {path}")
+    
+    def _write_shard_workbooks(self, shards: List[Dict[str, Any]]) -> None:
+        """Write each shard to its own workbook, in parallel worker processes."""
+        with ProcessPoolExecutor(max_workers=self.workers) as executor:
+            futures = []
+            for shard_number, shard in enumerate(shards, 1):
+                shard['path'] = self._shard_workbook_path(shard_number)
+                futures.append(executor.submit(_write_shard_workbook, str(shard['path']), shard['title'],
+                                               shard['analysis']))
+            
+            for future in futures:
+                self.logger.info(f"Shard workbook saved to: {future.result()}")
+    
+    def _create_shard_index_sheet(self, ws, shards: List[Dict[str, Any]]) -> None:
+        """Create an index worksheet linking to every shard of the differences report."""
+        ws.title = "All Differences"
+        
+        # Header
+        ws['A1'] = "All Configuration Differences - Index"
+        ws['A1'].font = Font(bold=True, size=12)
+        
+        # Column headers
+        row = 3
+        headers = ["Shard", "First File", "Last File", "First Host", "Last Host", "Differences"]
+        for col, header in enumerate(headers, 1):
+            ws.cell(row=row, column=col, value=header).font = Font(bold=True)
+        
+        row += 1
+        for shard in shards:
+            cell = ws.cell(row=row, column=1, value=shard['title'])
+            if 'path' in shard:
+                # Shard lives in its own workbook next to this one
+                cell.hyperlink = shard['path'].name
+            else:
+                cell.hyperlink = Hyperlink(ref=cell.coordinate, location=f"'{shard['title']}'!A1")
+            cell.font = Font(color="0000FF", underline="single")
+            
+            ws.cell(row=row, column=2, value=shard['first_file'])
+            ws.cell(row=row, column=3, value=shard['last_file'])
+            if shard['host_names']:
+                ws.cell(row=row, column=4, value=shard['host_names'][0])
+                ws.cell(row=row, column=5, value=shard['host_names'][-1])
+            ws.cell(row=row, column=6, value=len(shard['differences']))
+            row += 1
+    
     def _create_summary_sheet(self, ws, differences: List[Dict[str, Any]]) -> None:
         """Create the summary worksheet."""
         ws.title = "Summary"
@@ -368,7 +951,7 @@ class ConfigDiffTool:
                 ws[f'B{row}'] = file_diff_counts[file_name]
                 row += 1
     
-    def _create_consolidated_diff_sheet(self, ws, differences: List[Dict[str, Any]]) -> None:
+    def _create_consolidated_diff_sheet(self, ws, analysis: Dict[str, Any]) -> None:
         """Create a single worksheet with all differences."""
         ws.title = "All Differences"
         
@@ -376,6 +959,11 @@ class ConfigDiffTool:
         ws['A1'] = "All Configuration Differences"
         ws['A1'].font = Font(bold=True, size=12)
         
+        self._write_diff_rows(ws, analysis)
+    
+    @staticmethod
+    def _write_diff_rows(ws, analysis: Dict[str, Any]) -> None:
+        """Write the column headers and color-coded difference rows from a batch analysis."""
         # Column headers
         row = 3
         ws[f'A{row}'] = "File Name"
@@ -384,58 +972,51 @@ class ConfigDiffTool:
         ws[f'B{row}'].font = Font(bold=True)
         
         col = 3
-        host_names = sorted(self.host_configs.keys())
-        for host_name in host_names:
+        for host_name in analysis['host_names']:
             ws.cell(row=row, column=col, value=host_name)
             ws.cell(row=row, column=col).font = Font(bold=True)
             col += 1
         
-        # Data rows
+        # Data rows (appended after the header row)
+        first_data_row = row + 1
+        for file_name, key, values in zip(analysis['file_names'], analysis['keys'], analysis['values']):
+            ws.append([file_name, key, *values])
+        
+        # Color coding - only the cells flagged by the batch analysis are touched
+        fills = [
+            (analysis['missing'], PatternFill(start_color="FFFF00", end_color="FFFF00", fill_type="solid")),  # Yellow
+            (analysis['file_not_found'], PatternFill(start_color="FF0000", end_color="FF0000", fill_type="solid")),  # Red
+            (analysis['highlight'], PatternFill(start_color="FFA500", end_color="FFA500", fill_type="solid")),  # Orange
+        ]
+        for mask, fill in fills:
+            for row_offset, col_offset in zip(*np.nonzero(mask)):
+                ws.cell(row=first_data_row + int(row_offset), column=3 + int(col_offset)).fill = fill
+    
+    def _create_outliers_sheet(self, ws, outliers: List[Dict[str, Any]]) -> None:
+        """Create the outlier ranking worksheet."""
+        ws.title = "Outliers"
+        
+        # Header
+        ws['A1'] = "Outlier Hosts (MinHash similarity to nearest peers)"
+        ws['A1'].font = Font(bold=True, size=12)
+        ws['A2'] = f"Hosts scoring above {self.outlier_threshold} are flagged and included in All Differences"
+        ws['A2'].font = Font(italic=True)
+        
+        # Column headers
+        row = 3
+        headers = ["Host Name", "Outlier Score", "Nearest Peer", "Nearest Peer Similarity", "Flagged"]
+        for col, header in enumerate(headers, 1):
+            ws.cell(row=row, column=col, value=header).font = Font(bold=True)
+        
         row += 1
-        for diff in differences:
-            ws[f'A{row}'] = diff['file_name']
-            ws[f'B{row}'] = diff['key']
-            
-            # Determine which values are actually different
-            # Get all non-error values for this key
-            actual_values = [v for v in diff['hosts'].values() 
-                           if v not in ["** MISSING **", "** FILE NOT FOUND **"]]
-            
-            # If there's more than one unique actual value, determine which cells to highlight
-            values_to_highlight = set()
-            if len(set(actual_values)) > 1:
-                # Find the most common value (if any)
-                value_counts = {}
-                for val in actual_values:
-                    value_counts[val] = value_counts.get(val, 0) + 1
-                
-                # If there's a clear majority value, highlight only the minority values
-                # Otherwise, highlight all values that differ from each other
-                max_count = max(value_counts.values()) if value_counts else 0
-                majority_values = [val for val, count in value_counts.items() if count == max_count]
-                
-                if len(majority_values) == 1 and max_count > 1:
-                    # There's a clear majority value, highlight only the different ones
-                    majority_value = majority_values[0]
-                    values_to_highlight = set(val for val in actual_values if val != majority_value)
-                else:
-                    # No clear majority, highlight all different values
-                    values_to_highlight = set(actual_values)
-            
-            col = 3
-            for host_name in host_names:
-                value = diff['hosts'].get(host_name, "** NOT FOUND **")
-                cell = ws.cell(row=row, column=col, value=value)
-                
-                # Color coding - more precise highlighting
-                if value == "** MISSING **":
-                    cell.fill = PatternFill(start_color="FFFF00", end_color="FFFF00", fill_type="solid")  # Yellow
-                elif value == "** FILE NOT FOUND **":
-                    cell.fill = PatternFill(start_color="FF0000", end_color="FF0000", fill_type="solid")  # Red
-                elif value in values_to_highlight:
-                    cell.fill = PatternFill(start_color="FFA500", end_color="FFA500", fill_type="solid")  # Orange
-                
-                col += 1
+        for outlier in outliers:
+            ws.cell(row=row, column=1, value=outlier['host'])
+            ws.cell(row=row, column=2, value=outlier['score'])
+            ws.cell(row=row, column=3, value=outlier['nearest_peer'])
+            ws.cell(row=row, column=4, value=outlier['nearest_similarity'])
+            flagged_cell = ws.cell(row=row, column=5, value="YES" if outlier['flagged'] else "")
+            if outlier['flagged']:
+                flagged_cell.fill = PatternFill(start_color="FFA500", end_color="FFA500", fill_type="solid")  # Orange
             row += 1
     
     def _create_host_overview_sheet(self, ws) -> None:
@@ -465,14 +1046,38 @@ class ConfigDiffTool:
             ws[f'C{row}'] = total_keys
             row += 1
     
+    def _run_outliers(self) -> None:
+        """Rank outlier hosts, then report detailed differences for flagged hosts only."""
+        self.logger.info("Computing MinHash signatures for outlier detection...")
+        outliers = self.find_outliers()
+        flagged = [outlier for outlier in outliers if outlier['flagged']]
+        self.logger.info(f"Flagged {len(flagged)} of {len(outliers)} hosts as outliers")
+        
+        # Show each flagged host next to its nearest peer for reference
+        report_hosts = set()
+        for outlier in flagged:
+            report_hosts.add(outlier['host'])
+            if outlier['nearest_peer']:
+                report_hosts.add(outlier['nearest_peer'])
+        
+        differences = list(self.iter_differences(report_hosts)) if report_hosts else []
+        self.logger.info(f"Found {len(differences)} differences involving flagged hosts")
+        self.create_excel_report(differences, host_names=sorted(report_hosts), outliers=outliers)
+    
     def run(self) -> None:
         """Main execution method."""
         try:
             self.logger.info("Starting configuration diff analysis...")
             
-            # Scan directories and parse files
+            # Scan directories and parse files (starting clean in case the instance is reused)
+            self.reset()
             self.scan_directories()
             
+            if self.outliers:
+                self._run_outliers()
+                self.logger.info("Analysis complete!")
+                return
+            
             # Find differences
             self.logger.info("Analyzing differences...")
             differences = self.find_differences()
@@ -485,6 +1090,7 @@ class ConfigDiffTool:
                 ws.title = "No Differences Found"
                 ws['A1'] = "No configuration differences found across all hosts!"
                 ws['A1'].font = Font(bold=True, size=14)
+                self._remove_stale_shard_workbooks()
                 wb.save(self.output_file)
             else:
                 # Create Excel report
@@ -510,6 +1116,8 @@ Examples:
   python config_diff_tool.py /path/to/servers --verbose
   python config_diff_tool.py /path/to/servers --ignore-hostnames
   python config_diff_tool.py /path/to/servers --ignore-hostnames --verbose
+  python config_diff_tool.py /path/to/servers --max-rows-per-sheet 100000 --workers 4
+  python config_diff_tool.py /path/to/servers --outliers --outlier-threshold 0.1
         """
     )
     
@@ -536,11 +1144,62 @@ Examples:
         help='Ignore differences that are only due to hostname variations in format a(t|p)[chars]-(b|h|c|p)-[chars]-digits (e.g., atprod-b-server-1 vs atprod-b-server-2) when quoted or standalone'
     )
     
+    parser.add_argument(
+        '--max-rows-per-sheet',
+        type=int,
+        default=DEFAULT_MAX_ROWS_PER_SHEET,
+        help=f'Maximum difference rows per sheet before the report is sharded (default: {DEFAULT_MAX_ROWS_PER_SHEET})'
+    )
+    
+    parser.add_argument(
+        '--max-hosts-per-sheet',
+        type=int,
+        default=DEFAULT_MAX_HOSTS_PER_SHEET,
+        help=f'Maximum host columns per sheet before the report is sharded (default: {DEFAULT_MAX_HOSTS_PER_SHEET})'
+    )
+    
+    parser.add_argument(
+        '--shard-mode',
+        choices=['workbooks', 'sheets'],
+        default='workbooks',
+        help='Write shards as separate workbooks generated in parallel, or as extra sheets in the report '
+             '(only avoids Excel\'s hard limits, the file stays as large) (default: workbooks)'
+    )
+    
+    parser.add_argument(
+        '--workers',
+        type=int,
+        default=None,
+        help='Number of worker processes used with --shard-mode workbooks (default: CPU count)'
+    )
+    
+    parser.add_argument(
+        '--outliers',
+        action='store_true',
+        help='Rank hosts by MinHash similarity to their peers and report detailed differences only for outlier hosts'
+    )
+    
+    parser.add_argument(
+        '--outlier-threshold',
+        type=float,
+        default=DEFAULT_OUTLIER_THRESHOLD,
+        help=f'Outlier score (0-1) above which a host is flagged in --outliers mode (default: {DEFAULT_OUTLIER_THRESHOLD})'
+    )
+    
+    parser.add_argument(
+        '--outlier-neighbors',
+        type=int,
+        default=DEFAULT_OUTLIER_NEIGHBORS,
+        help=f'Number of nearest peers used to score each host in --outliers mode (default: {DEFAULT_OUTLIER_NEIGHBORS})'
+    )
+    
     args = parser.parse_args()
     
-    # Set logging level
-    if args.verbose:
-        logging.getLogger().setLevel(logging.DEBUG)
+    # Set up logging (only for command-line use; the library leaves global logging alone)
+    logging.basicConfig(
+        level=logging.DEBUG if args.verbose else logging.INFO,
+        format='%(asctime)s - %(levelname)s - %(message)s'
+    )
     
     # Validate input directory
     if not os.path.exists(args.directory):
@@ -549,7 +1208,12 @@ Examples:
     
     # Run the tool
     try:
-        tool = ConfigDiffTool(args.directory, args.output, args.ignore_hostnames)
+        tool = ConfigDiffTool(args.directory, args.output, args.ignore_hostnames,
+                              max_rows_per_sheet=args.max_rows_per_sheet,
+                              max_hosts_per_sheet=args.max_hosts_per_sheet,
+                              shard_mode=args.shard_mode, workers=args.workers,
+                              outliers=args.outliers, outlier_threshold=args.outlier_threshold,
+                              outlier_neighbors=args.outlier_neighbors)
         tool.run()
         print(f"\nReport generated successfully: {args.output}")
         
@@ -0,0 +1,311 @@
+"""Tests for config_diff_tool.py (run with: python -m pytest -q)"""
+
+import logging
+import random
+from pathlib import Path
+
+import pytest
+from openpyxl import load_workbook
+
+from config_diff_tool import ConfigDiffTool
+
+
+def _diff(file_name, key):
+    """Minimal difference record, enough for row sharding."""
+    return {'file_name': file_name, 'key': key}
+
+
+# Row sharding (user-026)
+
+def test_split_rows_keeps_files_together():
+    tool = ConfigDiffTool(max_rows_per_sheet=4)
+    differences = [_diff('a.rc', 'k1'), _diff('a.rc', 'k2'), _diff('b.rc', 'k1'),
+                   _diff('b.rc', 'k2'), _diff('b.rc', 'k3'), _diff('c.rc', 'k1')]
+
+    chunks = tool._split_rows_by_file(differences)
+
+    assert [[(d['file_name'], d['key']) for d in chunk] for chunk in chunks] == [
+        [('a.rc', 'k1'), ('a.rc', 'k2')],
+        [('b.rc', 'k1'), ('b.rc', 'k2'), ('b.rc', 'k3'), ('c.rc', 'k1')],
+    ]
+
+
+def test_split_rows_splits_oversized_file():
+    tool = ConfigDiffTool(max_rows_per_sheet=3)
+    differences = [_diff('a.rc', f'k{i}') for i in range(7)] + [_diff('b.rc', 'k1')]
+
+    chunks = tool._split_rows_by_file(differences)
+
+    assert [len(chunk) for chunk in chunks] == [3, 3, 2]
+    assert chunks[-1] == [_diff('a.rc', 'k6'), _diff('b.rc', 'k1')]
+    assert [d for chunk in chunks for d in chunk] == differences
+
+
+def test_sharded_report_writes_workbooks_and_removes_stale_parts(tmp_path):
+    output_file = tmp_path / "report.xlsx"
+    stale_part = tmp_path / "report_part99.xlsx"
+    unrelated = tmp_path / "report_partial.xlsx"
+    stale_part.write_bytes(b"")
+    unrelated.write_bytes(b"")
+
+    tool = ConfigDiffTool(output_file=str(output_file), max_rows_per_sheet=2, workers=1)
+    tool.load_configs({
+        'host1': {'a.rc': 'k1=1\nk2=1\nk3=1', 'b.rc': 'k1=1'},
+        'host2': {'a.rc': 'k1=2\nk2=2\nk3=2', 'b.rc': 'k1=2'},
+    })
+    tool.create_excel_report(tool.find_differences())
+
+    assert not stale_part.exists()
+    assert unrelated.exists()
+    assert sorted(p.name for p in tmp_path.glob("report_part*.xlsx")) == [
+        "report_part1.xlsx", "report_part2.xlsx", "report_partial.xlsx"]
+
+    index = load_workbook(output_file)["All Differences"]
+    assert [index.cell(row=row, column=1).hyperlink.target for row in (4, 5)] == [
+        "report_part1.xlsx", "report_part2.xlsx"]
+    shard = load_workbook(tmp_path / "report_part2.xlsx").active
+    assert [cell.value for cell in shard[4]] == ['a.rc', 'k3', '1', '2']
+
+
+# Library API (user-027)
+
+def test_compare_accepts_raw_text_and_parsed_mappings():
+    tool = ConfigDiffTool()
+
+    differences = list(tool.compare({
+        'host1': {'app.rc': '# comment\nport = 1\nname=a\nempty='},
+        'host2': {'app.rc': {'port': 2, 'name': 'a', 'empty': None}},
+        'host3': {},
+    }))
+
+    assert [(d['key'], d['hosts']) for d in differences] == [
+        ('port', {'host1': '1', 'host2': '2', 'host3': '** FILE NOT FOUND **'}),
+        ('name', {'host1': 'a', 'host2': 'a', 'host3': '** FILE NOT FOUND **'}),
+        ('empty', {'host1': '', 'host2': '', 'host3': '** FILE NOT FOUND **'}),
+    ]
+
+
+def test_compare_is_lazy_and_instance_is_reusable():
+    tool = ConfigDiffTool()
+
+    stream = tool.compare({'host1': {'a.rc': 'k=1', 'b.rc': 'k=1'},
+                           'host2': {'a.rc': 'k=2', 'b.rc': 'k=2'}})
+    assert next(stream)['file_name'] == 'a.rc'
+
+    # A second run starts from a clean state rather than merging with the first
+    differences = list(tool.compare({'host3': {'c.rc': 'k=1'}, 'host4': {'c.rc': 'k=2'}}))
+    assert [(d['file_name'], sorted(d['hosts'])) for d in differences] == [('c.rc', ['host3', 'host4'])]
+    assert sorted(tool.host_configs) == ['host3', 'host4']
+
+
+def test_compare_streams_survive_a_later_compare():
+    tool = ConfigDiffTool()
+    first = tool.compare({'host1': {'a.rc': 'k=1', 'b.rc': 'k=1'},
+                          'host2': {'a.rc': 'k=2', 'b.rc': 'k=2'}})
+    assert next(first)['file_name'] == 'a.rc'
+
+    second = tool.compare({'host3': {'c.rc': 'k=1'}, 'host4': {'c.rc': 'k=2'}})
+    assert next(second)['file_name'] == 'c.rc'
+
+    assert [(d['file_name'], sorted(d['hosts'])) for d in first] == [('b.rc', ['host1', 'host2'])]
+    assert list(second) == []
+
+
+def test_compare_loads_eagerly():
+    with pytest.raises(ValueError, match="No base directory"):
+        ConfigDiffTool().compare()
+
+
+def test_library_leaves_root_logger_alone():
+    root = logging.getLogger()
+    handlers, level = list(root.handlers), root.level
+
+    list(ConfigDiffTool().compare({'host1': {'a.rc': 'k=1'}, 'host2': {'a.rc': 'k=2'}}))
+
+    assert root.handlers == handlers
+    assert root.level == level
+
+
+# Outlier detection (user-028)
+
+def _write_fleet(base_directory, host_configs):
+    """Write {host: {file: text}} as host directories on disk."""
+    for host_name, files in host_configs.items():
+        for file_name, text in files.items():
+            path = base_directory / host_name / file_name
+            path.parent.mkdir(parents=True, exist_ok=True)
+            path.write_text(text)
+
+
+def _fleet_with_outliers(outlier_hosts):
+    """20 identical hosts plus outlier hosts sharing a config with 35 of 40 keys changed."""
+    baseline = {f"k{i}": f"v{i}" for i in range(40)}
+    outlier = dict(baseline, **{f"k{i}": f"changed{i}" for i in range(35)})
+    fleet = {f"host{h:02d}": {'app.rc': '\n'.join(f"{k}={v}" for k, v in baseline.items())} for h in range(20)}
+    for host_name in outlier_hosts:
+        fleet[host_name] = {'app.rc': '\n'.join(f"{k}={v}" for k, v in outlier.items())}
+    return fleet
+
+
+def test_outlier_without_peer_is_reported_against_reference_host(tmp_path):
+    _write_fleet(tmp_path / "servers", _fleet_with_outliers(['odd']))
+    output_file = tmp_path / "report.xlsx"
+
+    tool = ConfigDiffTool(str(tmp_path / "servers"), str(output_file), outliers=True)
+    tool.run()
+
+    worst, runner_up = tool.find_outliers()[:2]
+    assert worst['host'] == 'odd' and worst['flagged']
+    assert worst['nearest_peer'] == 'host00'
+    assert worst['nearest_similarity'] < 0.5
+    assert worst['score'] == pytest.approx(1 - worst['nearest_similarity'])
+    assert runner_up['score'] == 0.0 and not runner_up['flagged']
+
+    workbook = load_workbook(output_file)
+    differences = workbook["All Differences"]
+    assert [cell.value for cell in differences[3]] == ["File Name", "Key", "host00", "odd"]
+    assert differences.max_row - 3 == 35
+
+
+def test_identical_outliers_are_flagged_together():
+    tool = ConfigDiffTool()
+    tool.load_configs(_fleet_with_outliers(['odd1', 'odd2']))
+
+    outliers = {outlier['host']: outlier for outlier in tool.find_outliers()}
+
+    for host_name in ('odd1', 'odd2'):
+        assert outliers[host_name]['flagged']
+        assert outliers[host_name]['score'] > 0.5
+    assert not any(outlier['flagged'] for host_name, outlier in outliers.items() if host_name.startswith('host'))
+
+
+def test_small_fleet_scores_match_nearest_similarity():
+    # Three mutually different hosts: every host's peers are found, no fixed 1.0 scores
+    tool = ConfigDiffTool(str(Path(__file__).parent / 'sample_servers'))
+    tool.scan_directories()
+
+    outliers = tool.find_outliers()
+
+    assert all(outlier['nearest_peer'] is not None for outlier in outliers)
+    assert all(outlier['score'] < 1.0 for outlier in outliers)
+
+
+def test_iter_differences_rejects_unknown_hosts():
+    tool = ConfigDiffTool()
+    tool.load_configs({'host1': {'a.rc': 'k=1'}, 'host2': {'a.rc': 'k=2'}})
+
+    with pytest.raises(ValueError, match="typo"):
+        list(tool.iter_differences(['host1', 'typo']))
+
+    assert sorted(tool.host_configs) == ['host1', 'host2']
+
+
+# Batch analysis (user-029)
+
+def _reference_masks(differences, host_names):
+    """The original per-row dict algorithm the batch analysis replaced."""
+    missing, file_not_found, highlight = [], [], []
+    for diff in differences:
+        actual_values = [v for v in diff['hosts'].values()
+                         if v not in ["** MISSING **", "** FILE NOT FOUND **"]]
+        values_to_highlight = set()
+        if len(set(actual_values)) > 1:
+            value_counts = {}
+            for val in actual_values:
+                value_counts[val] = value_counts.get(val, 0) + 1
+            max_count = max(value_counts.values())
+            majority_values = [val for val, count in value_counts.items() if count == max_count]
+            if len(majority_values) == 1 and max_count > 1:
+                values_to_highlight = set(val for val in actual_values if val != majority_values[0])
+            else:
+                values_to_highlight = set(actual_values)
+
+        row_values = [diff['hosts'].get(host_name, "** NOT FOUND **") for host_name in host_names]
+        missing.append([value == "** MISSING **" for value in row_values])
+        file_not_found.append([value == "** FILE NOT FOUND **" for value in row_values])
+        highlight.append([value not in ("** MISSING **", "** FILE NOT FOUND **") and value in values_to_highlight
+                          for value in row_values])
+    return missing, file_not_found, highlight
+
+
+@pytest.mark.parametrize("seed", range(20))
+def test_analyze_differences_matches_per_row_algorithm(seed):
+    rng = random.Random(seed)
+    host_configs = {}
+    for host in range(rng.randint(2, 12)):
+        files = {}
+        for file_number in range(3):
+            if rng.random() < 0.15:
+                continue
+            # Few distinct values so ties, clear majorities and all-unique rows all occur
+            files[f"f{file_number}.rc"] = {f"k{key}": rng.choice(["a", "b", "c", f"own{host}"])
+                                           for key in range(15) if rng.random() < 0.85}
+        host_configs[f"host{host:02d}"] = files
+
+    tool = ConfigDiffTool()
+    tool.load_configs(host_configs)
+    differences = tool.find_differences()
+    host_names = sorted(tool.host_configs)
+    # Include a host absent from every record to cover the "** NOT FOUND **" cells
+    display_hosts = host_names + ['zz-absent']
+
+    analysis = tool.analyze_differences(differences, display_hosts)
+
+    missing, file_not_found, highlight = _reference_masks(differences, display_hosts)
+    assert analysis['missing'].tolist() == missing
+    assert analysis['file_not_found'].tolist() == file_not_found
+    assert analysis['highlight'].tolist() == highlight
+    assert analysis['values'][:, -1].tolist() == ["** NOT FOUND **"] * len(differences)
+
+    # A subset of columns (as shown by a host-range shard) keeps the full-record highlighting
+    subset = sorted(rng.sample(host_names, rng.randint(1, len(host_names))))
+    subset_analysis = tool.analyze_differences(differences, subset)
+    assert subset_analysis['highlight'].tolist() == _reference_masks(differences, subset)[2]
+
+
+def test_analyze_differences_majority_and_ties():
+    tool = ConfigDiffTool()
+    tool.load_configs({
+        'h1': {'a.rc': 'majority=x\ntie=x\nunique=1\nsingle=x'},
+        'h2': {'a.rc': 'majority=x\ntie=x\nunique=2'},
+        'h3': {'a.rc': 'majority=y\ntie=y\nunique=3\nsingle=y'},
+        'h4': {'a.rc': 'majority=x\ntie=y'},
+    })
+    differences = tool.find_differences()
+
+    analysis = tool.analyze_differences(differences)
+
+    assert [d['key'] for d in differences] == ['majority', 'tie', 'unique', 'single']
+    assert analysis['highlight'].tolist() == [
+        [False, False, True, False],   # clear majority: only the minority value
+        [True, True, True, True],      # tie: every actual value
+        [True, True, True, False],     # all different; h4 is missing the key
+        [True, False, True, False],    # one each: no majority with a single host
+    ]
+    assert analysis['missing'][:, 3].tolist() == [False, False, True, True]
+
+
+def test_analyze_differences_single_host_column():
+    tool = ConfigDiffTool()
+    tool.load_configs({'h1': {'a.rc': 'k=1\nj=1'}, 'h2': {'a.rc': 'k=2'}, 'h3': {'a.rc': 'k=2\nj=1'}})
+    differences = tool.find_differences()
+
+    analysis = tool.analyze_differences(differences, ['h1'])
+
+    assert analysis['values'].tolist() == [['1'], ['1']]
+    assert analysis['highlight'].tolist() == [[True], [False]]
+    assert analysis['missing'].tolist() == [[False], [False]]
+
+
+def test_analyze_differences_subset_uses_all_record_hosts():
+    tool = ConfigDiffTool()
+    tool.load_configs({'h1': {'a.rc': 'k=1'}, 'h2': {'a.rc': 'k=2'}, 'h3': {'a.rc': 'k=2'}})
+    differences = tool.find_differences()
+
+    analysis = tool.analyze_differences(differences, ['h1', 'h2'])
+
+    # h3 is not shown but still makes "2" the majority, so only h1 is highlighted
+    assert analysis['host_names'] == ['h1', 'h2']
+    assert analysis['highlight'].tolist() == [[True, False]]
+    missing, file_not_found, highlight = _reference_masks(differences, ['h1', 'h2'])
+    assert analysis['highlight'].tolist() == highlight